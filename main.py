@@ -1,8 +1,10 @@
 import os
+import atexit
 import asyncio
-import yaml
 import time
-from src.core.config_manager import DeviceTableManager
+import random
+from concurrent.futures import ThreadPoolExecutor
+from src.core.config_manager import ConfigManager, DeviceTableManager
 from src.services.data_service import DataService
 
 if __name__ == "__main__":
@@ -15,10 +17,10 @@ if __name__ == "__main__":
     
     # Create type tables for different device types
     DeviceTableManager.create_type_tables_from_schema(schema_yaml_path, device_yaml_path)
+    DeviceTableManager.close_all()
 
-    # Load schema config
-    with open(schema_yaml_path, 'r') as f:
-        schema_config = yaml.safe_load(f)
+    # Load schema config (already parsed and cached by the table setup above)
+    schema_config = ConfigManager.load_yaml(schema_yaml_path)
 
     # Create data service - no specific db_config needed anymore
     data_service = DataService(
@@ -26,6 +28,7 @@ if __name__ == "__main__":
         device_config_path=device_yaml_path,
         schema_config_path=schema_yaml_path
     )
+    atexit.register(data_service.close)
     # Get devices grouped by type
     devices_by_type = {}
     for device_name, device_info in data_service.device_config['devices'].items():
@@ -34,66 +37,145 @@ if __name__ == "__main__":
             devices_by_type[device_type] = []
         devices_by_type[device_type].append(device_name)
     
+    # Resolve per-device connection details once; they do not change between polls.
+    # SmartPlugs without an IP can never be polled, so they are dropped here.
+    tapo_plan = []
+    for device_name in devices_by_type.get('SmartPlug', []):
+        ip = data_service.device_config['devices'][device_name].get('ip')
+        if ip:
+            username, password = data_service.get_device_credentials(device_name)
+            tapo_plan.append((device_name, ip, username, password))
+    schneider_plan = list(devices_by_type.get('schneider', []))
+    
+    # One worker per Modbus device keeps blocking reads off the shared default executor
+    modbus_executor = ThreadPoolExecutor(max_workers=max(1, len(schneider_plan)), thread_name_prefix='modbus')
+    
+    POLL_INTERVAL = 5.0
+    MAX_BACKOFF = 30.0
+    # Failed cycles counted towards the backoff; MAX_BACKOFF is reached well before this,
+    # the cap only keeps 2 ** attempt from overflowing a float during a long outage
+    MAX_ATTEMPT = 8
+    TAPO_TIMEOUT = 2.0
+    MAX_TAPO_CONCURRENCY = 8
+    
     print("Starting data collection...")
     
     async def main_loop():
-        while True:
-            # Collect data from all device types
-            async def collect_all_data():
-                saved_devices = {}
-                
-                # Handle each device type
-                for device_type, device_names in devices_by_type.items():
-                    saved_devices[device_type] = False
+        # Consecutive cycles in which every polled device failed
+        attempt = 0
+        # Let poll tasks run up to their first real suspension without an extra loop turn (3.12+)
+        loop = asyncio.get_running_loop()
+        if hasattr(asyncio, 'eager_task_factory'):
+            loop.set_task_factory(asyncio.eager_task_factory)
+        
+        # Cap in-flight Tapo requests so a large fan-out does not swamp the router
+        tapo_semaphore = asyncio.Semaphore(MAX_TAPO_CONCURRENCY)
+        
+        async def poll_tapo(device_name, ip, username, password):
+            async with tapo_semaphore:
+                # The timeout starts once a slot is free; cancelling the task directly
+                # avoids the extra wrapper task wait_for would create
+                loop = asyncio.get_running_loop()
+                handle = loop.call_at(loop.time() + TAPO_TIMEOUT, asyncio.current_task().cancel)
+                try:
+                    return await data_service.get_tapo_device_data(username, password, ip, device_name)
+                finally:
+                    handle.cancel()
+        
+        next_poll = loop.time()
+        try:
+            while True:
+                # Collect data from all device types
+                async def collect_all_data():
+                    saved_devices = {device_type: False for device_type in devices_by_type}
+                    failures = 0
+                    loop = asyncio.get_running_loop()
+                    tasks = []
+                    polled = []
+                    
+                    # Schedule a poll for every device so they all run concurrently
+                    # Handle Tapo devices
+                    for device_name, ip, username, password in tapo_plan:
+                        tasks.append(loop.create_task(poll_tapo(device_name, ip, username, password)))
+                        polled.append(('SmartPlug', device_name))
+                    
+                    # Handle Schneider devices (Modbus) in a worker thread
+                    for device_name in schneider_plan:
+                        tasks.append(loop.run_in_executor(
+                            modbus_executor, data_service.get_modbus_device_data, device_name
+                        ))
+                        polled.append(('schneider', device_name))
+                    
+                    # Partial failures are returned in place so one device cannot abort the batch
+                    results = await asyncio.gather(*tasks, return_exceptions=True)
                     
-                    for device_name in device_names:
+                    tapo_rows = []
+                    for (device_type, device_name), data in zip(polled, results):
                         try:
-                            device_info = data_service.device_config['devices'][device_name]
+                            if isinstance(data, asyncio.CancelledError):
+                                # Only the Tapo timeout cancels individual polls
+                                raise asyncio.TimeoutError
+                            if isinstance(data, BaseException):
+                                raise data
                             
                             if device_type == 'SmartPlug':
-                                # Handle Tapo devices
-                                username, password = data_service.get_device_credentials(device_name)
-                                ip = device_info.get('ip')
-                                if not ip:
-                                    continue
-                                
-                                data = await asyncio.wait_for(
-                                    data_service.get_tapo_device_data(username, password, ip, device_name),
-                                    timeout=2.0
-                                )
-                                await data_service.save_data(data, table_name='tapo_device_metrics')
-                                saved_devices[device_type] = True
-                                
+                                tapo_rows.append(data)
                             elif device_type == 'schneider':
-                                # Handle Schneider devices (Modbus)
-                                data = await asyncio.get_event_loop().run_in_executor(
-                                    None, data_service.get_modbus_device_data, device_name
-                                )
+                                # An unreachable gateway comes back as error keys rather than an
+                                # exception; count it as a failure instead of storing a row of NULLs
+                                errors = [value for key, value in data.items() if key == 'error' or key.endswith('_error')]
+                                if errors and not any(
+                                    key not in ('device_name', 'timestamp') and key != 'error' and not key.endswith('_error')
+                                    for key in data
+                                ):
+                                    raise ConnectionError(errors[0])
                                 data_service.save_schneider_device_reading(device_name, data)
                                 saved_devices[device_type] = True
-                                
+                            
                         except asyncio.TimeoutError:
                             print(f"Timeout connecting to {device_type} device {device_name}")
+                            failures += 1
                         except Exception as e:
                             print(f"Error with {device_type} device {device_name}: {str(e)[:100]}")
+                            failures += 1
+                    
+                    # Write every Tapo reading of this cycle in one batch and one commit
+                    if tapo_rows:
+                        try:
+                            await data_service.save_data_many(tapo_rows, table_name='tapo_device_metrics')
+                            saved_devices['SmartPlug'] = True
+                        except Exception as e:
+                            print(f"Error saving SmartPlug data: {str(e)[:100]}")
+                            failures += 1
+                    
+                    return saved_devices, failures
                 
-                return saved_devices
-            
-            # Run the async function to collect all data
-            try:
-                saved_devices = await collect_all_data()
+                # Run the async function to collect all data
+                try:
+                    saved_devices, failures = await collect_all_data()
+                    attempt = min(attempt + 1, MAX_ATTEMPT) if failures and not any(saved_devices.values()) else 0
+                    
+                    # Print messages for each device type that was saved
+                    for device_type, was_saved in saved_devices.items():
+                        if was_saved:
+                            device_names = devices_by_type.get(device_type, [])
+                            for device_name in device_names:
+                                print(f"{device_type} data saved for {device_name}")
+                except Exception as e:
+                    print(f"Error during data collection: {e}")
+                    attempt = min(attempt + 1, MAX_ATTEMPT)
                 
-                # Print messages for each device type that was saved
-                for device_type, was_saved in saved_devices.items():
-                    if was_saved:
-                        device_names = devices_by_type.get(device_type, [])
-                        for device_name in device_names:
-                            print(f"{device_type} data saved for {device_name}")
-            except Exception as e:
-                print(f"Error during data collection: {e}")
-            
-            # Simple 5-second sleep (interruptible with Ctrl+C)
-            await asyncio.sleep(5)
+                # Poll every 5 seconds; while everything is failing, back off exponentially with jitter
+                delay = POLL_INTERVAL
+                if attempt:
+                    delay = min(MAX_BACKOFF, POLL_INTERVAL * 2 ** (attempt - 1)) * (1 + random.uniform(0, 0.5))
+                # Measure the delay from the start of the cycle, so polling keeps a steady
+                # cadence; a cycle that overran starts the next one immediately
+                next_poll = max(next_poll + delay, loop.time())
+                await asyncio.sleep(next_poll - loop.time())
+        finally:
+            modbus_executor.shutdown(wait=False)
+            await data_service.aclose()
     
     try:
         asyncio.run(main_loop())
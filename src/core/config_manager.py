@@ -1,14 +1,121 @@
+import os
+import json
 import yaml
 from pathlib import Path
 import sqlite3
+from collections import OrderedDict
+
+# Prefer the libyaml C parser; fall back to the pure-Python one when it is unavailable
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
+# orjson is optional; the stdlib json module reads and writes the same sidecar
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+    def _json_dumps(data):
+        return json.dumps(data, separators=(',', ':')).encode()
+
+# Parsed YAML, least recently used first, keyed by (abspath, st_mtime_ns, st_size)
+_YAML_CACHE = OrderedDict()
+_YAML_CACHE_SIZE = 64
+
+def _load_yaml(path):
+    """Parse a YAML file, reusing the previous result while the file is unchanged."""
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    data = _YAML_CACHE.get(key)
+    if data is not None:
+        _YAML_CACHE.move_to_end(key)
+        return data
+    header = f"# v={st.st_mtime_ns}:{st.st_size}\n".encode()
+    mode = st.st_mode & 0o777
+    data = _load_yaml_sidecar(path, header, mode)
+    if data is None:
+        with open(path, 'rb') as f:
+            data = yaml.load(f, Loader=YamlLoader)
+        _dump_yaml_sidecar(path, header, data, mode)
+    _YAML_CACHE[key] = data
+    if len(_YAML_CACHE) > _YAML_CACHE_SIZE:
+        _YAML_CACHE.popitem(last=False)
+    return data
+
+def _load_yaml_sidecar(path, header, mode):
+    """
+    Return the JSON copy of a YAML file if its header matches the source's mtime/size, else None.
+    A copy readable more widely than the source is also ignored, so the next dump replaces it.
+    """
+    try:
+        with open(path + '.cache.json', 'rb') as f:
+            if os.fstat(f.fileno()).st_mode & 0o777 & ~mode:
+                return None
+            if f.readline() != header:
+                return None
+            return _json_loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+def _dump_yaml_sidecar(path, header, data, mode):
+    # The sidecar is only a startup shortcut, so an unwritable config dir is not an error.
+    # Skip documents JSON would change (non-string keys, dates) rather than cache them lossily
+    try:
+        body = _json_dumps(data)
+        if _json_loads(body) != data:
+            return
+    except (TypeError, ValueError):
+        return
+    # The copy holds whatever the source does (device credentials included), so it gets the
+    # source's permissions, and is renamed into place so readers never see a partial file
+    cache_path = path + '.cache.json'
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, mode)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header + body)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
 
 class ConfigManager:
     @staticmethod
     def load_config(config_type: str):
-        with open(Path(__file__).parent.parent.parent / f"config/{config_type}_config.yaml") as f:
-            return yaml.safe_load(f)
+        return _load_yaml(Path(__file__).parent.parent.parent / f"config/{config_type}_config.yaml")
+
+    @staticmethod
+    def load_yaml(path):
+        """Load any YAML file through the shared parse cache."""
+        return _load_yaml(path)
 
 class DeviceTableManager:
+    # Connections shared by the schema setup methods, keyed by db file; see close_all()
+    _conns = {}
+
+    @classmethod
+    def _get(cls, db_file):
+        conn = cls._conns.get(db_file)
+        if conn is None:
+            conn = sqlite3.connect(db_file)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            cls._conns[db_file] = conn
+        return conn
+
+    @classmethod
+    def close_all(cls):
+        """Close the connections opened during table setup."""
+        while cls._conns:
+            _, conn = cls._conns.popitem()
+            conn.close()
+
     @staticmethod
     def create_devices_table(db_path):
         conn = sqlite3.connect(db_path)
@@ -25,8 +132,7 @@ class DeviceTableManager:
 
     @staticmethod
     def insert_devices_from_yaml(db_path, yaml_path):
-        with open(yaml_path, 'r') as f:
-            data = yaml.safe_load(f)
+        data = _load_yaml(yaml_path)
         devices = data.get('devices', {})
         with sqlite3.connect(db_path) as conn:
             for name, info in devices.items():
@@ -38,8 +144,7 @@ class DeviceTableManager:
 
     @staticmethod
     def create_type_tables_from_devices(db_path, yaml_path):
-        with open(yaml_path, 'r') as f:
-            data = yaml.safe_load(f)
+        data = _load_yaml(yaml_path)
         devices = data.get('devices', {})
         types = set(info.get('type', '') for info in devices.values())
         conn = sqlite3.connect(db_path)
@@ -57,8 +162,8 @@ class DeviceTableManager:
         conn.close()
 
     # For backward compatibility, allow an optional db_path as the first argument
-    @staticmethod
-    def create_type_tables_from_schema(*args):
+    @classmethod
+    def create_type_tables_from_schema(cls, *args):
         if len(args) == 3:
             # Ignore the first argument (db_path) for compatibility
             _, schema_path, device_yaml_path = args
@@ -66,10 +171,8 @@ class DeviceTableManager:
             schema_path, device_yaml_path = args
         else:
             raise TypeError("create_type_tables_from_schema expects 2 or 3 arguments (db_path, schema_path, device_yaml_path) or (schema_path, device_yaml_path)")
-        with open(device_yaml_path, 'r') as f:
-            device_data = yaml.safe_load(f)
-        with open(schema_path, 'r') as f:
-            schema_data = yaml.safe_load(f)
+        device_data = _load_yaml(device_yaml_path)
+        schema_data = _load_yaml(schema_path)
         for device_type, type_info in schema_data.items():
             if device_type == 'database':
                 continue
@@ -85,7 +188,7 @@ class DeviceTableManager:
             # Check if device_name is already in the schema
             has_device_name = any(col.startswith('device_name ') for col in columns)
             
-            conn = sqlite3.connect(db_file)
+            conn = cls._get(db_file)
             if has_device_name:
                 conn.execute(f"""
                     CREATE TABLE IF NOT EXISTS {table_name} (
@@ -102,50 +205,41 @@ class DeviceTableManager:
                     )
                 """)
             conn.commit()
-            conn.close()
 
-    @staticmethod
-    def create_devices_table_from_schema(schema_path):
-        import yaml
-        with open(schema_path, 'r') as f:
-            schema_config = yaml.safe_load(f)
+    @classmethod
+    def create_devices_table_from_schema(cls, schema_path):
+        schema_config = _load_yaml(schema_path)
         devices_db = schema_config['devices_db']
         db_file = devices_db['file']
         table_name = devices_db['table']
         columns = [f"{col['name']} {col['type']}" for col in devices_db['schema']]
-        with sqlite3.connect(db_file) as conn:
-            conn.execute(f"DROP TABLE IF EXISTS {table_name}")
-            conn.execute(f"""
-                CREATE TABLE {table_name} (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    {', '.join(columns)}
-                )
-            """)
-            conn.commit()
+        conn = cls._get(db_file)
+        conn.execute(f"DROP TABLE IF EXISTS {table_name}")
+        conn.execute(f"""
+            CREATE TABLE {table_name} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                {', '.join(columns)}
+            )
+        """)
+        conn.commit()
 
-    @staticmethod
-    def insert_devices_from_yaml_to_devices_db(schema_path, device_yaml_path):
-        import yaml
-        with open(schema_path, 'r') as f:
-            schema_config = yaml.safe_load(f)
+    @classmethod
+    def insert_devices_from_yaml_to_devices_db(cls, schema_path, device_yaml_path):
+        schema_config = _load_yaml(schema_path)
         devices_db = schema_config['devices_db']
         db_file = devices_db['file']
         table_name = devices_db['table']
         columns = [col['name'] for col in devices_db['schema']]
-        with open(device_yaml_path, 'r') as f:
-            device_config = yaml.safe_load(f)
+        device_config = _load_yaml(device_yaml_path)
         devices = device_config.get('devices', {})
-        with sqlite3.connect(db_file) as conn:
-            for name, info in devices.items():
-                # Only insert fields that are in the schema
-                values = []
-                for col in columns:
-                    if col == 'name':
-                        values.append(name)
-                    else:
-                        values.append(info.get(col, ''))
-                conn.execute(
-                    f"INSERT OR REPLACE INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join(['?' for _ in columns])})",
-                    values
-                )
-            conn.commit()
\ No newline at end of file
+        # Only insert fields that are in the schema
+        rows = [
+            [name if col == 'name' else info.get(col, '') for col in columns]
+            for name, info in devices.items()
+        ]
+        conn = cls._get(db_file)
+        conn.executemany(
+            f"INSERT OR REPLACE INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join(['?' for _ in columns])})",
+            rows
+        )
+        conn.commit()
\ No newline at end of file
@@ -1,26 +1,411 @@
+import asyncio
+import os
 import sqlite3
 import aiosqlite
 from tapo import ApiClient
-from datetime import datetime
-import yaml
+import time
 import socket
+import sys
+import threading
 from umodbus import conf
 from umodbus.client import tcp
+from umodbus.exceptions import ModbusError
 import struct  # Add this import for struct unpacking
+from contextlib import contextmanager
+from dataclasses import dataclass
+from src.core.config_manager import ConfigManager
+
+# Registers arrive as raw unsigned words; signedness comes from each field's format.
+# Set once here because it is process-wide state shared by every polling thread
+conf.SIGNED_VALUES = False
+
+# WAL with synchronous=NORMAL avoids an fsync per commit for the small, frequent metric
+# inserts; journal_mode persists in the file, the rest is per connection
+SQLITE_PRAGMAS = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA mmap_size=268435456;
+    PRAGMA cache_size=-65536;
+"""
+
+# (epoch second, its formatted local date/time); one tuple so threads never see half an update
+_TS_SECOND = (None, '')
+
+def _ts():
+    """
+    Current local time in the same format as datetime.now().isoformat(), formatting
+    the date/time part once per second instead of building a datetime per reading.
+    """
+    global _TS_SECOND
+    now = time.time()
+    second = int(now)
+    cached_second, prefix = _TS_SECOND
+    if second != cached_second:
+        prefix = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(second))
+        _TS_SECOND = (second, prefix)
+    return f"{prefix}.{int((now - second) * 1_000_000):06d}"
+
+def _connect_sync(db_file):
+    """
+    Open a sqlite3 connection with SQLITE_PRAGMAS applied. The pragmas cost far more
+    than an insert, so callers keep the connection; see DataService._sync_conn.
+    The connection may be used from any thread, provided callers serialise access.
+    """
+    conn = sqlite3.connect(db_file, check_same_thread=False)
+    conn.executescript(SQLITE_PRAGMAS)
+    return conn
+
+# Direct extractors for the SmartPlug schema fields whose source is known
+TAPO_FIELD_EXTRACTORS = {
+    'device_on': lambda device_info, energy_usage: int(device_info.device_on),
+    'nickname': lambda device_info, energy_usage: device_info.nickname,
+    'signal_level': lambda device_info, energy_usage: device_info.signal_level,
+    'current_power': lambda device_info, energy_usage: energy_usage.current_power,
+    'today_energy': lambda device_info, energy_usage: energy_usage.today_energy,
+    'month_energy': lambda device_info, energy_usage: energy_usage.month_energy,
+    'timestamp': lambda device_info, energy_usage: _ts(),
+}
+
+# Fallback (table, db file) for device types whose schema entry omits them
+DEFAULT_STORAGE = {
+    'SmartPlug': ('tapo_device_metrics', 'tapo_data.db'),
+    'PowerSupply': ('powersupply_device_metrics', 'powersupply_data.db'),
+    'schneider': ('schneider_device_metrics', 'schneider_data.db'),
+}
+
+# Top-level schema_config.yaml sections that are not device types
+NON_DEVICE_SECTIONS = ('database', 'devices_db')
+
+# dataclass grew slots= in Python 3.10; older interpreters keep the per-instance __dict__
+DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+# Packs raw 16-bit registers back into the bytes they came from, by register count
+REGISTER_WORDS = {count: struct.Struct(f'>{count}H') for count in (1, 2, 4)}
+# Fallback decode: the first register as a signed 16-bit value
+SIGNED_REGISTER = struct.Struct('>h')
+
+@dataclass(frozen=True, **DATACLASS_SLOTS)
+class ModbusField:
+    name: str
+    address: int
+    length: int
+    scale: float
+    fmt: str
+    unpacker: struct.Struct = SIGNED_REGISTER  # See _modbus_unpacker
+
+@dataclass(frozen=True, **DATACLASS_SLOTS)
+class ModbusGroup:
+    """One read_holding_registers request covering several fields."""
+    start: int
+    quantity: int
+    fields: tuple          # (offset into the response, ModbusField)
+
+# Largest unused register gap bridged when merging fields, and the protocol's read limit
+MODBUS_GAP_THRESHOLD = 4
+MODBUS_MAX_REGISTERS = 125
+
+def _group_modbus_fields(modbus_fields):
+    """
+    Merge fields with nearby addresses into as few register reads as possible.
+    Fields without a usable address/length keep a request of their own, so their
+    error is still reported per field.
+    """
+    groups = []
+    valid = []
+    for field in modbus_fields:
+        if isinstance(field.address, int) and isinstance(field.length, int) and field.length > 0:
+            valid.append(field)
+        else:
+            groups.append(ModbusGroup(start=field.address, quantity=field.length, fields=((0, field),)))
+
+    start = end = None
+    members = []
+    for field in sorted(valid, key=lambda f: f.address):
+        field_end = field.address + field.length
+        if members and field.address - end <= MODBUS_GAP_THRESHOLD and max(end, field_end) - start <= MODBUS_MAX_REGISTERS:
+            end = max(end, field_end)
+        else:
+            if members:
+                groups.append(ModbusGroup(start=start, quantity=end - start, fields=tuple(members)))
+            start, end, members = field.address, field_end, []
+        members.append((field.address - start, field))
+    if members:
+        groups.append(ModbusGroup(start=start, quantity=end - start, fields=tuple(members)))
+    return tuple(groups)
+
+def _split_modbus_group(group):
+    """One request per field of group, for devices that refuse the registers between them."""
+    return tuple(
+        ModbusGroup(start=field.address, quantity=field.length, fields=((0, field),))
+        for _, field in group.fields
+    )
+
+def _modbus_unpacker(length, fmt):
+    """
+    Compile the schema format if it is big-endian and spans exactly the field's registers,
+    else fall back to SIGNED_REGISTER, which is how those fields decoded under umodbus's
+    SIGNED_VALUES. The registers are repacked big-endian, so any other byte order would
+    silently decode garbage.
+    """
+    if not isinstance(fmt, str) or not fmt.startswith(('>', '!')):
+        return SIGNED_REGISTER
+    try:
+        unpacker = struct.Struct(fmt)
+    except (struct.error, TypeError):
+        return SIGNED_REGISTER
+    if length in REGISTER_WORDS and unpacker.size == 2 * length:
+        return unpacker
+    return SIGNED_REGISTER
+
+def _decode_modbus_field(field, registers, buf):
+    unpacker = field.unpacker
+    count = unpacker.size // 2
+    REGISTER_WORDS[count].pack_into(buf, 0, *registers[:count])
+    value = unpacker.unpack_from(buf)[0]
+    return value / field.scale if field.scale > 1 else value
+
+@dataclass(frozen=True, **DATACLASS_SLOTS)
+class SchemaPlan:
+    """Everything reading and saving one device type needs, resolved from the schema once."""
+    device_type: str
+    table: str
+    db_file: str
+    fields: tuple          # Columns after device_name, in schema order; always includes timestamp
+    column_types: tuple    # SQL type of each entry in fields
+    modbus_fields: tuple   # ModbusField per register-backed field
+    modbus_groups: tuple   # ModbusGroup per register read, built from modbus_fields
+    insert_sql: str
+    create_sql: str
+    timestamp_index: int   # Position of timestamp in the INSERT values, or None
+
+def _tapo_attribute(name, device_info, energy_usage):
+    """
+    Pick the source of a field outside TAPO_FIELD_EXTRACTORS from a sample response:
+    device_info if it has the attribute, else energy_usage, else always None.
+    """
+    if hasattr(device_info, name):
+        return lambda device_info, energy_usage: getattr(device_info, name, None)
+    if hasattr(energy_usage, name):
+        return lambda device_info, energy_usage: getattr(energy_usage, name, None)
+    return lambda device_info, energy_usage: None
 
 class DataService:
+    __slots__ = (
+        'db_config', 'device_config_path', 'schema_config_path', 'device_config', 'schema_config',
+        '_tapo_extractors', '_tapo_unresolved', '_plans', '_conn', '_conn_lock', '_aconn', '_api_clients', '_tapo_devices',
+        '_modbus_sockets', '_modbus_locks', '_modbus_groups',
+    )
+
     def __init__(self, db_config: dict, device_config_path: str, schema_config_path: str):
         self.db_config = db_config
         self.device_config_path = device_config_path
         self.schema_config_path = schema_config_path
+        # Long-lived sqlite3 connections keyed by db file for the synchronous paths, shared by
+        # every thread that saves, and the lock serialising their use; see _sync_conn
+        self._conn = {}
+        self._conn_lock = threading.RLock()
         if db_config:  # Only create table if db_config is provided
             self.create_table(db_config)
         self.device_config = self.load_yaml(device_config_path)
         self.schema_config = self.load_yaml(schema_config_path)
+        self._tapo_extractors = self._build_tapo_extractors()
+        
+        # Per device type plans; types missing from the schema get one on first use
+        self._plans = {
+            device_type: self._build_plan(device_type, type_config)
+            for device_type, type_config in self.schema_config.items()
+            if device_type not in NON_DEVICE_SECTIONS and isinstance(type_config, dict)
+        }
+        self._ensure_schema()
+        
+        # Long-lived aiosqlite connections keyed by db file, opened on first use
+        self._aconn = {}
+        
+        # Tapo clients keyed by (email, password) and logged-in P110 handles keyed by ip
+        self._api_clients = {}
+        self._tapo_devices = {}
+        
+        # Open Modbus TCP connections and the locks serialising requests on them, keyed by (ip, port)
+        self._modbus_sockets = {}
+        self._modbus_locks = {}
+        # Per device register groups, once a merged read has been refused; see get_modbus_device_data
+        self._modbus_groups = {}
 
     def load_yaml(self, path):
-        with open(path, 'r') as f:
-            return yaml.safe_load(f)
+        # Shared, mtime-validated cache; the result is only read, so it is not copied
+        return ConfigManager.load_yaml(path)
+
+    def _build_tapo_extractors(self):
+        """
+        Resolve the SmartPlug schema into (field_name, extractor) pairs once,
+        so each poll only calls the extractors. Fields without a known extractor
+        get None until the first response shows which object carries them.
+        """
+        extractors = []
+        for field in self.schema_config.get('SmartPlug', {}).get('schema', []):
+            if not field or 'name' not in field:
+                continue
+            field_name = field['name']
+            # device_name comes from the caller, not the device
+            if field_name == 'device_name':
+                continue
+            extractors.append((field_name, TAPO_FIELD_EXTRACTORS.get(field_name)))
+        self._tapo_unresolved = any(extract is None for _, extract in extractors)
+        return extractors
+
+    def _resolve_tapo_extractors(self, device_info, energy_usage):
+        """Fill in the extractors _build_tapo_extractors left open, using the first response."""
+        self._tapo_extractors = [
+            (field_name, extract or _tapo_attribute(field_name, device_info, energy_usage))
+            for field_name, extract in self._tapo_extractors
+        ]
+        self._tapo_unresolved = False
+
+    @staticmethod
+    def _get_table_columns(db_file: str, table: str):
+        """Return the table's columns (without id), or an empty tuple if it does not exist yet."""
+        if not os.path.exists(db_file):
+            return ()
+        conn = sqlite3.connect(db_file)
+        try:
+            return tuple(row[1] for row in conn.execute(f"PRAGMA table_info({table})") if row[1] != 'id')
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _build_insert_sql(table: str, columns):
+        placeholders = ', '.join(['?' for _ in columns])
+        return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+
+    def _build_plan(self, device_type: str, type_config: dict):
+        if device_type in DEFAULT_STORAGE:
+            default_table, default_file = DEFAULT_STORAGE[device_type]
+        else:
+            default_table = f"{device_type.lower()}_device_metrics"
+            default_file = self.db_config['database']['file'] if self.db_config else f"{device_type.lower()}_data.db"
+        table = type_config.get('table', default_table)
+        db_file = type_config.get('file', default_file)
+        
+        fields = []
+        column_types = []
+        modbus_fields = []
+        for col in type_config.get('schema', []):
+            if not col or 'name' not in col:
+                continue
+            name = col['name']
+            # device_name is always bound first by the save path
+            if name == 'device_name':
+                continue
+            fields.append(name)
+            column_types.append(col.get('type', 'TEXT'))
+            if name != 'timestamp':
+                modbus_fields.append(ModbusField(
+                    name=name,
+                    address=col.get('address'),
+                    length=col.get('length', 1),
+                    scale=col.get('scale', 1),
+                    fmt=col.get('format', '>I'),
+                    unpacker=_modbus_unpacker(col.get('length', 1), col.get('format', '>I')),
+                ))
+        
+        # Make sure timestamp is included in the schema fields
+        if 'timestamp' not in fields:
+            fields.append('timestamp')
+            column_types.append('TEXT')
+        
+        # Look the table up once: a table created from an older schema lacks newer fields,
+        # and binding those would fail every insert
+        table_columns = self._get_table_columns(db_file, table)
+        if table_columns:
+            kept = [i for i, name in enumerate(fields) if name in table_columns]
+            fields = [fields[i] for i in kept]
+            column_types = [column_types[i] for i in kept]
+        
+        return SchemaPlan(
+            device_type=device_type,
+            table=table,
+            db_file=db_file,
+            fields=tuple(fields),
+            column_types=tuple(column_types),
+            modbus_fields=tuple(modbus_fields),
+            modbus_groups=_group_modbus_fields(modbus_fields),
+            insert_sql=self._build_insert_sql(table, ('device_name',) + tuple(fields)),
+            timestamp_index=fields.index('timestamp') + 1 if 'timestamp' in fields else None,
+            create_sql=f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    device_name TEXT,
+                    {', '.join(f"{field} {col_type}" for field, col_type in zip(fields, column_types))}
+                )
+            """,
+        )
+
+    def _ensure_schema(self):
+        """
+        Create every plan's table up front so the save path never has to, with one
+        connection and one DDL script per database file.
+        """
+        scripts = {}
+        for plan in self._plans.values():
+            scripts.setdefault(plan.db_file, []).append(plan.create_sql)
+        for db_file, statements in scripts.items():
+            with self._sync_conn(db_file) as conn:
+                conn.executescript(';\n'.join(statements) + ';')
+
+    def _create_plan_table(self, plan):
+        with self._sync_conn(plan.db_file) as conn:
+            conn.execute(plan.create_sql)
+
+    def _get_plan(self, device_type: str):
+        plan = self._plans.get(device_type)
+        if plan is None:
+            plan = self._plans[device_type] = self._build_plan(device_type, {})
+            self._create_plan_table(plan)
+        return plan
+
+    @contextmanager
+    def _sync_conn(self, db_file: str):
+        """
+        Hold the cached sqlite3 connection for db_file, opening it on first use, inside a
+        transaction that commits on success and rolls back on error.
+        """
+        with self._conn_lock:
+            conn = self._conn.get(db_file)
+            if conn is None:
+                conn = self._conn[db_file] = _connect_sync(db_file)
+            with conn:
+                yield conn
+
+    async def _get_aconn(self, db_file: str):
+        conn = self._aconn.get(db_file)
+        if conn is None:
+            conn = await aiosqlite.connect(db_file)
+            await conn.executescript(SQLITE_PRAGMAS)
+            cached = self._aconn.setdefault(db_file, conn)
+            if cached is not conn:
+                # A concurrent save opened the same file while this one was connecting
+                await conn.close()
+                conn = cached
+        return conn
+
+    def close(self):
+        """Release the resources that do not need the event loop; safe to call more than once."""
+        self._tapo_devices.clear()
+        self._api_clients.clear()
+        for key in list(self._modbus_sockets):
+            self._drop_modbus_sock(key)
+        with self._conn_lock:
+            while self._conn:
+                _, conn = self._conn.popitem()
+                conn.close()
+
+    async def aclose(self):
+        """Close the cached aiosqlite connections, then everything close() handles."""
+        while self._aconn:
+            _, conn = self._aconn.popitem()
+            await conn.close()
+        self.close()
 
     def create_table(self, config: dict):
         # Keep all columns from schema, even if some fields are removed from data collection
@@ -28,97 +413,154 @@ class DataService:
         for col in config['database']['schema']:
             if col and 'name' in col and 'type' in col:
                 columns.append(f"{col['name']} {col['type']}")
-        with sqlite3.connect(config['database']['file']) as conn:
+        with self._sync_conn(config['database']['file']) as conn:
             conn.execute(f"""
                 CREATE TABLE IF NOT EXISTS {config['database']['table']} (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     {', '.join(columns)}
                 )
             """)
-            conn.commit()
 
     
+    async def _get_tapo_device(self, email: str, password: str, ip: str):
+        """Return the cached P110 handle for ip, logging in only on first use."""
+        device = self._tapo_devices.get(ip)
+        if device is None:
+            client = self._api_clients.get((email, password))
+            if client is None:
+                client = ApiClient(email, password)
+                self._api_clients[(email, password)] = client
+            device = await client.p110(ip)
+            self._tapo_devices[ip] = device
+        return device
+
     async def get_tapo_device_data(self, email: str, password: str, ip: str, device_name: str = None):
-        device = await ApiClient(email, password).p110(ip)
-        device_info = await device.get_device_info()
-        energy_usage = await device.get_energy_usage()
-        data = {}
+        device = await self._get_tapo_device(email, password, ip)
+        try:
+            # The two requests are independent, so let them overlap on the wire
+            device_info, energy_usage = await asyncio.gather(
+                device.get_device_info(), device.get_energy_usage()
+            )
+        except Exception:
+            # Invalid credentials or an expired session: log in again on the next poll
+            self._tapo_devices.pop(ip, None)
+            raise
+        if self._tapo_unresolved:
+            self._resolve_tapo_extractors(device_info, energy_usage)
+        data = {field_name: extract(device_info, energy_usage) for field_name, extract in self._tapo_extractors}
         
         # Add device_name if provided
         if device_name:
             data['device_name'] = device_name
-        
-        # Get SmartPlug schema
-        smartplug_config = self.schema_config.get('SmartPlug', {})
-        schema_fields = smartplug_config.get('schema', [])
-        
-        for field in schema_fields:
-            if not field or 'name' not in field:
-                continue
-            field_name = field['name']
-            
-            # Skip device_name as we've already added it
-            if field_name == 'device_name':
-                continue
-                
-            # Try to get from device_info, then energy_usage, else None
-            value = getattr(device_info, field_name, None)
-            if value is None:
-                value = getattr(energy_usage, field_name, None)
-            if field_name == 'timestamp':
-                value = datetime.now().isoformat()
-            data[field_name] = value
         return data
     
     async def save_data(self, data: dict, table_name: str = None):
+        await self.save_data_many([data], table_name=table_name)
+
+    async def save_data_many(self, rows: list, table_name: str = None):
+        """
+        Save several Tapo readings with a single executemany and one commit.
+        """
         # Use SmartPlug configuration for Tapo devices
-        smartplug_config = self.schema_config.get('SmartPlug', {})
-        table = table_name if table_name else smartplug_config.get('table', 'tapo_device_metrics')
-        db_file = smartplug_config.get('file', 'tapo_data.db')
+        plan = self._get_plan('SmartPlug')
+        insert_sql = plan.insert_sql
+        if table_name and table_name != plan.table:
+            insert_sql = self._build_insert_sql(table_name, ('device_name',) + plan.fields)
+        fields = plan.fields
+        insert_data = [[row.get('device_name'), *map(row.get, fields)] for row in rows]
         
-        async with aiosqlite.connect(db_file) as conn:
-            schema_fields = [field['name'] for field in smartplug_config.get('schema', []) if field and 'name' in field]
-            insert_data = [data.get(field, None) for field in schema_fields]
-            placeholders = ', '.join(['?' for _ in schema_fields])
-
-            await conn.execute(
-                f"INSERT INTO {table} ({', '.join(schema_fields)}) VALUES ({placeholders})",
-                insert_data
-            )
-            await conn.commit()
+        conn = await self._get_aconn(plan.db_file)
+        await conn.executemany(insert_sql, insert_data)
+        await conn.commit()
 
     async def save_device_reading(self, device_name: str, device_type: str, data: dict):
         """
         Save a reading for a device into its type table, including device_name as a column.
         """
-        type_schema = self.schema_config.get(device_type, [])
-        schema_fields = [col['name'] for col in type_schema]
-        insert_data = [device_name] + [data.get(field, None) for field in schema_fields]
-        placeholders = ', '.join(['?' for _ in range(len(insert_data))])
-        table_name = device_type
-        async with aiosqlite.connect(self.db_config['database']['file']) as conn:
-            await conn.execute(
-                f"INSERT INTO {table_name} (device_name, {', '.join(schema_fields)}) VALUES ({placeholders})",
-                insert_data
-            )
-            await conn.commit()
+        plan = self._get_plan(device_type)
+        insert_data = self._reading_values(plan, device_name, data)
+        conn = await self._get_aconn(plan.db_file)
+        await conn.execute(plan.insert_sql, insert_data)
+        await conn.commit()
 
     async def save_all_devices(self, readings: dict):
         """
         readings: { device_name: {type: ..., data: {...}} }
+        Rows are written with one executemany per device type and a single
+        commit per database file; the database files are written concurrently.
         """
+        grouped = {}
         for device_name, info in readings.items():
-            await self.save_device_reading(device_name, info['type'], info['data'])
+            plan = self._get_plan(info['type'])
+            grouped.setdefault(plan.device_type, []).append(
+                self._reading_values(plan, device_name, info['data'])
+            )
+        
+        by_db_file = {}
+        for device_type, rows in grouped.items():
+            plan = self._plans[device_type]
+            by_db_file.setdefault(plan.db_file, []).append((plan.insert_sql, rows))
+        
+        await asyncio.gather(*(
+            self._save_batches(db_file, batches) for db_file, batches in by_db_file.items()
+        ))
+
+    async def _save_batches(self, db_file: str, batches):
+        conn = await self._get_aconn(db_file)
+        # sqlite3 opens the transaction implicitly on the first INSERT
+        for insert_sql, rows in batches:
+            await conn.executemany(insert_sql, rows)
+        await conn.commit()
 
     def get_device_credentials(self, device_name: str):
         device = self.device_config['devices'].get(device_name, {})
         return device.get('username'), device.get('password')
 
+    def _get_modbus_sock(self, key):
+        sock = self._modbus_sockets.get(key)
+        if sock is None or sock.fileno() == -1:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            sock.settimeout(1.0)
+            try:
+                sock.connect(key)
+            except Exception:
+                sock.close()
+                raise
+            self._modbus_sockets[key] = sock
+        return sock
+
+    def _drop_modbus_sock(self, key):
+        sock = self._modbus_sockets.pop(key, None)
+        if sock is not None:
+            sock.close()
+
+    def _send_modbus(self, key, request):
+        """
+        Send a request on the pooled connection. A Modbus exception response leaves
+        the connection usable; anything else (reset, timeout, short read) may leave it
+        dead or out of sync, so reconnect and retry once.
+        """
+        try:
+            return tcp.send_message(request, self._get_modbus_sock(key))
+        except ModbusError:
+            raise
+        except Exception:
+            self._drop_modbus_sock(key)
+        try:
+            return tcp.send_message(request, self._get_modbus_sock(key))
+        except ModbusError:
+            raise
+        except Exception:
+            self._drop_modbus_sock(key)
+            raise
+
     def get_modbus_device_data(self, device_name: str):
         """
         Read data from a Modbus TCP device using its IP/port from YAML and schema from schema_config.yaml.
         Returns a dict of field_name: value.
-        Reads each field individually for robust mapping.
+        Neighbouring registers are fetched in one request and sliced per field.
         """
         device = self.device_config['devices'].get(device_name, {})
         device_type = device.get('type', 'modbus')  # Get device type
@@ -127,10 +569,11 @@ class DataService:
         slave_id = int(device.get('slave_id', 6))  # Convert to int in case it's stored as string
         
         # Get schema based on device type, fallback to modbus
-        device_schema = self.schema_config.get(device_type, {}).get('schema', [])
-        if not device_schema:
-            device_schema = self.schema_config.get('modbus', {}).get('schema', [])
-            
+        plan = self._plans.get(device_type)
+        if plan is None or not plan.modbus_fields:
+            plan = self._plans.get('modbus', plan)
+        modbus_groups = self._modbus_groups.get(device_name) or (plan.modbus_groups if plan else ())
+        
         data = {}
         
         # Add device_name to the data
@@ -139,207 +582,82 @@ class DataService:
         if not ip:
             return data
             
-        conf.SIGNED_VALUES = True
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(1.0) 
-        try:
-            sock.connect((ip, port))
-            for field in device_schema:
-                name = field.get('name')
-                # Skip device_name as we've already added it
-                if name == 'device_name':
-                    continue
-                    
-                # Handle timestamp specially
-                if name == 'timestamp':
-                    data['timestamp'] = datetime.now().isoformat()
-                    continue
-                
-                address = field.get('address')
-                length = field.get('length', 1)
-                scale = field.get('scale', 1)
-                fmt = field.get('format', '>I')
-                
-                try:
-                    request = tcp.read_holding_registers(slave_id=slave_id, starting_address=address, quantity=length)
-                    response = tcp.send_message(request, sock)
-                    
-                    if length == 2 and fmt == '>f':
-                        safe_values = [(v & 0xFFFF) for v in response]
-                        byte_string = struct.pack('>HH', safe_values[0], safe_values[1])
-                        value = struct.unpack(fmt, byte_string)[0]
-                        value = value / scale if scale > 1 else value
-                        data[name] = value
-                    else:
-                        data[name] = response[0] / scale if scale > 1 else response[0]
-                except Exception as e:
-                    data[f"{name}_error"] = str(e)
+        key = (ip, port)
+        # Scratch buffer reused for every multi-register decode in this read
+        buf = bytearray(REGISTER_WORDS[4].size)
+        # Devices behind the same gateway share its connection, one request at a time
+        with self._modbus_locks.setdefault(key, threading.Lock()):
+            try:
+                self._get_modbus_sock(key)
+                # One round trip per group of neighbouring registers instead of one per field
+                for group in modbus_groups:
+                    try:
+                        request = tcp.read_holding_registers(slave_id=slave_id, starting_address=group.start, quantity=group.quantity)
+                        response = self._send_modbus(key, request)
+                    except ModbusError as e:
+                        if len(group.fields) == 1:
+                            data[f"{group.fields[0][1].name}_error"] = str(e)
+                            continue
+                        # A bridged gap may hold registers the device refuses; fall back to per-field
+                        # reads, and keep reading this group field by field on later polls
+                        response = None
+                        self._modbus_groups[device_name] = tuple(
+                            split
+                            for other in self._modbus_groups.get(device_name, modbus_groups)
+                            for split in (_split_modbus_group(other) if other is group else (other,))
+                        )
+                    except Exception as e:
+                        # Timeouts and resets would only repeat per field, each with its own retry
+                        for _, field in group.fields:
+                            data[f"{field.name}_error"] = str(e)
+                        continue
                     
-            # Make sure timestamp is always set
-            if 'timestamp' not in data:
-                data['timestamp'] = datetime.now().isoformat()
+                    for offset, field in group.fields:
+                        try:
+                            if response is None:
+                                request = tcp.read_holding_registers(slave_id=slave_id, starting_address=field.address, quantity=field.length)
+                                registers = self._send_modbus(key, request)
+                            else:
+                                registers = response[offset:offset + field.length]
+                            data[field.name] = _decode_modbus_field(field, registers, buf)
+                        except Exception as e:
+                            data[f"{field.name}_error"] = str(e)
                 
-        except Exception as e:
-            data['error'] = str(e)
-        finally:
-            sock.close()
+                data['timestamp'] = _ts()
+            
+            except Exception as e:
+                data['error'] = str(e)
         return data
 
-    def save_modbus_device_reading(self, device_name: str, data: dict):
-        """
-        Save a reading for a Modbus device into the modbus_device_metrics table, including device_name as a column.
-        """
-        modbus_config = self.schema_config.get('modbus', {})
-        
-        # Filter out the device_name field from schema_fields if it exists
-        schema_fields = [col['name'] for col in modbus_config.get('schema', []) 
-                        if col['name'] != 'device_name']
-        
-        # Make sure timestamp is included in the schema fields
-        if 'timestamp' not in schema_fields:
-            schema_fields.append('timestamp')
-        
-        # Ensure timestamp is set
-        if 'timestamp' not in data or data['timestamp'] is None:
-            data['timestamp'] = datetime.now().isoformat()
-        
+    def _reading_values(self, plan, device_name: str, data: dict):
+        """Fill in device_name/timestamp defaults and return the INSERT values for plan."""
         # Make sure device_name is set in the data
-        if 'device_name' not in data:
-            data['device_name'] = device_name
-        
-        # Prepare data for insertion
-        values = [data['device_name']]
-        for field in schema_fields:
-            values.append(data.get(field))
+        name = data['device_name'] = data.get('device_name') or device_name
         
-        placeholders = ', '.join(['?' for _ in range(len(values))])
-        table_name = modbus_config.get('table', 'modbus_device_metrics')
-        db_file = modbus_config.get('file', self.db_config['database']['file'])
-        
-        with sqlite3.connect(db_file) as conn:
-            try:
-                query = f"INSERT INTO {table_name} (device_name, {', '.join(schema_fields)}) VALUES ({placeholders})"
-                conn.execute(query, values)
-                conn.commit()
-            except Exception as e:
-                # Create the table if it doesn't exist
-                conn.execute(f"""
-                    CREATE TABLE IF NOT EXISTS {table_name} (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        device_name TEXT,
-                        {', '.join([f"{field} {col['type'] if 'type' in col else 'TEXT'}" for field, col in zip(schema_fields, modbus_config.get('schema', []))])}
-                    )
-                """)
-                conn.commit()
-                # Try again
-                conn.execute(
-                    f"INSERT INTO {table_name} (device_name, {', '.join(schema_fields)}) VALUES ({placeholders})",
-                    values
-                )
-                conn.commit()
+        # map(data.get) builds the row in C instead of a per-field Python loop
+        values = [name, *map(data.get, plan.fields)]
+        # Ensure timestamp is set; it was already read into values, so check it there
+        if plan.timestamp_index is not None and not values[plan.timestamp_index]:
+            values[plan.timestamp_index] = _ts()
+        return values
 
-    def save_powersupply_device_reading(self, device_name: str, data: dict):
+    def save_typed_reading(self, device_type: str, device_name: str, data: dict):
         """
-        Save a reading for a PowerSupply device into the powersupply_device_metrics table.
+        Save a reading into the table of its device type, including device_name as a column.
         """
-        powersupply_config = self.schema_config.get('PowerSupply', {})
-        
-        # Filter out the device_name field from schema_fields if it exists
-        schema_fields = [col['name'] for col in powersupply_config.get('schema', []) 
-                        if col['name'] != 'device_name']
-        
-        # Make sure timestamp is included in the schema fields
-        if 'timestamp' not in schema_fields:
-            schema_fields.append('timestamp')
-        
-        # Ensure timestamp is set
-        if 'timestamp' not in data or data['timestamp'] is None:
-            data['timestamp'] = datetime.now().isoformat()
-        
-        # Make sure device_name is set in the data
-        if 'device_name' not in data:
-            data['device_name'] = device_name
-        
-        # Prepare data for insertion
-        values = [data['device_name']]
-        for field in schema_fields:
-            values.append(data.get(field))
-        
-        placeholders = ', '.join(['?' for _ in range(len(values))])
-        table_name = powersupply_config.get('table', 'powersupply_device_metrics')
-        db_file = powersupply_config.get('file', 'powersupply_data.db')
-        
-        with sqlite3.connect(db_file) as conn:
-            try:
-                query = f"INSERT INTO {table_name} (device_name, {', '.join(schema_fields)}) VALUES ({placeholders})"
-                conn.execute(query, values)
-                conn.commit()
-            except Exception as e:
-                # Create the table if it doesn't exist
-                conn.execute(f"""
-                    CREATE TABLE IF NOT EXISTS {table_name} (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        device_name TEXT,
-                        {', '.join([f"{field} {col['type'] if 'type' in col else 'TEXT'}" for field, col in zip(schema_fields, powersupply_config.get('schema', []))])}
-                    )
-                """)
-                conn.commit()
-                # Try again
-                conn.execute(
-                    f"INSERT INTO {table_name} (device_name, {', '.join(schema_fields)}) VALUES ({placeholders})",
-                    values
-                )
-                conn.commit()
+        plan = self._get_plan(device_type)
+        values = self._reading_values(plan, device_name, data)
+        with self._sync_conn(plan.db_file) as conn:
+            conn.execute(plan.insert_sql, values)
+
+    def save_modbus_device_reading(self, device_name: str, data: dict):
+        """Save a reading for a Modbus device into the modbus_device_metrics table."""
+        return self.save_typed_reading('modbus', device_name, data)
+
+    def save_powersupply_device_reading(self, device_name: str, data: dict):
+        """Save a reading for a PowerSupply device into the powersupply_device_metrics table."""
+        return self.save_typed_reading('PowerSupply', device_name, data)
 
     def save_schneider_device_reading(self, device_name: str, data: dict):
-        """
-        Save a reading for a Schneider device into the schneider_device_metrics table.
-        """
-        schneider_config = self.schema_config.get('schneider', {})
-        
-        # Filter out the device_name field from schema_fields if it exists
-        schema_fields = [col['name'] for col in schneider_config.get('schema', []) 
-                        if col['name'] != 'device_name']
-        
-        # Make sure timestamp is included in the schema fields
-        if 'timestamp' not in schema_fields:
-            schema_fields.append('timestamp')
-        
-        # Ensure timestamp is set
-        if 'timestamp' not in data or data['timestamp'] is None:
-            data['timestamp'] = datetime.now().isoformat()
-        
-        # Make sure device_name is set in the data
-        if 'device_name' not in data:
-            data['device_name'] = device_name
-        
-        # Prepare data for insertion
-        values = [data['device_name']]
-        for field in schema_fields:
-            values.append(data.get(field))
-        
-        placeholders = ', '.join(['?' for _ in range(len(values))])
-        table_name = schneider_config.get('table', 'schneider_device_metrics')
-        db_file = schneider_config.get('file', 'schneider_data.db')
-        
-        with sqlite3.connect(db_file) as conn:
-            try:
-                query = f"INSERT INTO {table_name} (device_name, {', '.join(schema_fields)}) VALUES ({placeholders})"
-                conn.execute(query, values)
-                conn.commit()
-            except Exception as e:
-                # Create the table if it doesn't exist
-                conn.execute(f"""
-                    CREATE TABLE IF NOT EXISTS {table_name} (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        device_name TEXT,
-                        {', '.join([f"{field} {col['type'] if 'type' in col else 'TEXT'}" for field, col in zip(schema_fields, schneider_config.get('schema', []))])}
-                    )
-                """)
-                conn.commit()
-                # Try again
-                conn.execute(
-                    f"INSERT INTO {table_name} (device_name, {', '.join(schema_fields)}) VALUES ({placeholders})",
-                    values
-                )
-                conn.commit()
\ No newline at end of file
+        """Save a reading for a Schneider device into the schneider_device_metrics table."""
+        return self.save_typed_reading('schneider', device_name, data)